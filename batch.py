@@ -0,0 +1,274 @@
+# Toplu Arıza Kaydı Analizi - Kontrol noktalı (checkpoint), kaldığı yerden devam eden çalıştırma
+import contextlib
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from channels import load_recorded_channels
+from fault_classifier import FaultClassifier
+
+DEFAULT_TIMEOUT = 600  # saniye / belge
+MANIFEST_NAME = 'manifest.json'
+FLEET_SUMMARY_NAME = 'ariza_tipleri.csv'
+LAYOUT_CACHE_NAME = 'ocr_layouts.json'
+# Filo sınıflandırmasında aynı anda açık tutulan kayıt sayısı (dosya tanıtıcı sınırı için)
+FLEET_BATCH_SIZE = 32
+
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_TIMEOUT = 'timeout'
+
+
+def load_manifest(manifest_path):
+    """Önceki çalıştırmanın manifestini oku (yoksa boş manifest döndür)"""
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return {'documents': {}}
+
+
+def save_manifest(manifest, manifest_path):
+    """Manifesti atomik olarak yaz - yazma sırasında çökme dosyayı bozmasın"""
+    manifest['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+
+
+def _document_key(pdf_path):
+    return os.path.abspath(pdf_path)
+
+
+def document_folder(output_dir, pdf_path):
+    # Farklı klasörlerdeki aynı adlı PDF'ler çakışmasın diye tam yolun özeti eklenir
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    digest = hashlib.sha1(_document_key(pdf_path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(output_dir, f"{stem}_{digest}")
+
+
+def _run_document(pdf_path, csv_folder, conn, channel_source=None, layout_cache_path=None):
+    """Tek belgeyi ayrı süreçte analiz et ve özeti ana sürece gönder"""
+    # Kendi süreç grubunu aç ki zaman aşımında alt süreçler (tesseract) de öldürülebilsin
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    os.makedirs(csv_folder, exist_ok=True)
+    log_path = os.path.join(csv_folder, 'analiz.log')
+    try:
+        with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+            from data2 import RelayFaultAnalyzer
+            # OCR yerleşim önbelleği tüm işçilerce ortak dosyadan okunur ve güncellenir
+            analyzer = RelayFaultAnalyzer(layout_cache_path=layout_cache_path)
+            results = analyzer.analyze_pdf_complete_with_csv(pdf_path, export_csv=True,
+                                                             channel_source=channel_source,
+                                                             csv_folder=csv_folder, visualize=False)
+        if results is None:
+            conn.send({'status': STATUS_FAILED, 'error': "PDF'den metin çıkarılamadı"})
+        else:
+            conn.send({
+                'status': STATUS_COMPLETED,
+                'csv_folder': results['csv_folder'],
+                'vendor': results['fault_info'].get('vendor', ''),
+                'sampling_rate': results['fault_info'].get('sampling_rate', ''),
+                'probable_cause': results['analysis']['probable_cause'],
+                'fault_type': results['analysis'].get('fault_type')
+            })
+    except Exception as e:
+        conn.send({'status': STATUS_FAILED, 'error': f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def source_signature(source, sampling_rate=None):
+    """Kanal kaynağının değişip değişmediğini anlamak için yol, boyut ve değişiklik zamanı özeti"""
+    if not isinstance(source, (str, os.PathLike)) or not os.path.exists(source):
+        return None
+    paths = [source]
+    if os.path.isdir(source):
+        paths += sorted(os.path.join(source, name) for name in os.listdir(source))
+    stats = [(os.path.abspath(path), os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in paths]
+    return hashlib.sha1(repr((stats, sampling_rate)).encode('utf-8')).hexdigest()[:16]
+
+
+def classify_fleet(channel_sources, sampling_rates=None, output_path=None, classifier=None,
+                   batch_size=FLEET_BATCH_SIZE):
+    """Kayıtların arıza tiplerini örnekleme hızına göre gruplayıp toplu (vektörel) sınıflandır
+
+    channel_sources: belge anahtarı -> kanal kaynağı; sampling_rates: kaynak hızı
+    taşımıyorsa (NPY) kullanılacak belge anahtarı -> örnekleme hızı eşlemesi.
+    Kayıtlar batch_size'lık gruplar halinde açılır ve grup sınıflandırılınca
+    kapatılır; açık dosya sayısı arşiv boyutundan bağımsızdır. output_path
+    varsa diğer belgelerin önceki satırları korunarak güncellenir.
+    """
+    sampling_rates = sampling_rates or {}
+    classifier = classifier or FaultClassifier()
+    keys = list(channel_sources)
+    results = []
+    for first in range(0, len(keys), batch_size):
+        batch_keys = keys[first:first + batch_size]
+        records, rates, errors = [], [], {}
+        try:
+            for i, key in enumerate(batch_keys):
+                try:
+                    channels, rate = load_recorded_channels(channel_sources[key])
+                except Exception as e:
+                    print(f"⚠️ {key}: kanal kaynağı açılamadı ({e})")
+                    channels, rate = {}, None
+                    errors[i] = f"Kanal kaynağı açılamadı: {e}"
+                records.append(channels)
+                rates.append(rate or sampling_rates.get(key))
+            features = classifier.classify_archive(records, rates)
+        finally:
+            for channels in records:
+                if hasattr(channels, 'close'):
+                    channels.close()
+
+        # Açılamayan kaynaklar 'kanal eksik' değil, gerçek hatasıyla raporlansın
+        for i, error in errors.items():
+            features.loc[i, 'note'] = error
+        features.index = batch_keys
+        results.append(features)
+
+    features = pd.concat(results) if results else pd.DataFrame()
+    features.index.name = 'document'
+    features = features.reset_index()
+    if output_path:
+        if os.path.exists(output_path):
+            previous = pd.read_csv(output_path)
+            features = pd.concat([previous[~previous['document'].isin(keys)], features], ignore_index=True)
+        features.to_csv(output_path, index=False)
+    return features
+
+
+def _kill_worker(process):
+    """Takılan işçi sürecini alt süreçleriyle birlikte sonlandır"""
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.is_alive():
+        process.kill()
+    process.join()
+
+
+def run_batch(pdf_paths, output_dir, manifest_path=None, timeout=DEFAULT_TIMEOUT, workers=1, retry_failed=False,
+              channel_sources=None):
+    """PDF listesini kontrol noktalı olarak analiz et, manifesti her belgeden sonra güncelle
+
+    channel_sources: PDF yolu -> kayıtlı kanal kaynağı (.npy/.h5/.zarr) eşlemesi (isteğe bağlı)
+    """
+    channel_sources = channel_sources or {}
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    documents = manifest['documents']
+
+    # Tamamlananları (ve istenmiyorsa hatalıları) atla
+    skip_statuses = {STATUS_COMPLETED} if retry_failed else {STATUS_COMPLETED, STATUS_FAILED, STATUS_TIMEOUT}
+    pending = [path for path in pdf_paths
+               if documents.get(_document_key(path), {}).get('status') not in skip_statuses]
+    print(f"📦 Toplam {len(pdf_paths)} belge, {len(pdf_paths) - len(pending)} belge manifestten atlandı.")
+
+    context = multiprocessing.get_context('spawn')
+    active = {}
+
+    def finish(pdf_path, entry):
+        entry.update({
+            'duration_s': round(time.monotonic() - active[pdf_path]['started'], 2),
+            'finished_at': datetime.now().isoformat(timespec='seconds')
+        })
+        documents[_document_key(pdf_path)] = entry
+        save_manifest(manifest, manifest_path)
+        del active[pdf_path]
+        print(f"{'✅' if entry['status'] == STATUS_COMPLETED else '❌'} {os.path.basename(pdf_path)}: {entry['status']}")
+
+    try:
+        while pending or active:
+            # Boş işçi yuvalarını doldur
+            while pending and len(active) < workers:
+                pdf_path = pending.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_run_document,
+                                          args=(pdf_path, document_folder(output_dir, pdf_path), sender,
+                                                channel_sources.get(pdf_path),
+                                                os.path.join(output_dir, LAYOUT_CACHE_NAME)))
+                process.start()
+                sender.close()
+                active[pdf_path] = {'process': process, 'conn': receiver, 'started': time.monotonic()}
+
+            for pdf_path, worker in list(active.items()):
+                process, conn = worker['process'], worker['conn']
+                # Canlılık poll'dan önce okunur: işçi sonucu gönderip bu arada çıkmışsa
+                # sonuç poll'da görülür ve yanlışlıkla hatalı sayılmaz
+                alive = process.is_alive()
+                if conn.poll():
+                    try:
+                        entry = conn.recv()
+                    except EOFError:
+                        entry = {'status': STATUS_FAILED, 'error': 'İşçi süreç sonuç göndermeden kapandı'}
+                    process.join()
+                    finish(pdf_path, entry)
+                elif not alive:
+                    finish(pdf_path, {'status': STATUS_FAILED,
+                                      'error': f'İşçi süreç beklenmedik şekilde sonlandı (kod {process.exitcode})'})
+                elif time.monotonic() - worker['started'] > timeout:
+                    _kill_worker(process)
+                    finish(pdf_path, {'status': STATUS_TIMEOUT, 'error': f'{timeout} s zaman aşımı'})
+
+            time.sleep(0.1)
+    finally:
+        # Kesinti (Ctrl+C vb.) durumunda yarım kalan işçileri temizle; manifest zaten günceldir
+        for worker in active.values():
+            _kill_worker(worker['process'])
+
+    # Kanal kaynağı verilen kayıtlar için filo genelinde toplu arıza tipi; yalnızca yeni veya
+    # kaynağı/örnekleme hızı değişen belgeler yeniden sınıflandırılır
+    if channel_sources:
+        sources, rates, signatures = {}, {}, {}
+        for path, source in channel_sources.items():
+            key = _document_key(path)
+            rate = documents.get(key, {}).get('sampling_rate')
+            signature = source_signature(source, rate)
+            entry = documents.get(key, {})
+            if signature is None or entry.get('fleet_signature') != signature or 'fleet_fault_type' not in entry:
+                sources[key], rates[key], signatures[key] = source, rate, signature
+        if sources:
+            fleet = classify_fleet(sources, rates, os.path.join(output_dir, FLEET_SUMMARY_NAME))
+            for key, label in zip(fleet['document'], fleet['fault_label']):
+                if key in sources and key in documents:
+                    documents[key]['fleet_fault_type'] = label
+                    documents[key]['fleet_signature'] = signatures[key]
+            save_manifest(manifest, manifest_path)
+            print(f"🔎 Filo sınıflandırması ({len(sources)} kayıt): {os.path.join(output_dir, FLEET_SUMMARY_NAME)}")
+
+    counts = {}
+    for entry in documents.values():
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    print(f"📊 Manifest durumu: {counts}")
+    return manifest
+
+
+# Kullanım
+if __name__ == "__main__":
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else "toplu_analiz"
+
+    pdf_files = sorted(glob.glob(os.path.join(input_dir, '*.pdf')))
+    print("🚀 Toplu Röle Arıza Analizi Başlatılıyor...")
+    print(f"📁 Klasör: {os.path.abspath(input_dir)}")
+    print("-" * 50)
+
+    run_batch(pdf_files, output_dir)
@@ -0,0 +1,181 @@
+# Kayıtlı Analog Kanal Erişimi - Büyük kayıtları belleğe yüklemeden okuma
+import os
+import re
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from scipy import signal
+
+try:
+    import h5py
+    H5PY_AVAILABLE = True
+except ImportError:
+    H5PY_AVAILABLE = False
+
+try:
+    import zarr
+    ZARR_AVAILABLE = True
+except ImportError:
+    ZARR_AVAILABLE = False
+
+DEFAULT_CHUNK_SIZE = 65536
+# Seyreltme öncesi alçak geçiren filtre: kesim yeni Nyquist'in %80'i
+ANTIALIAS_TAPS_PER_STEP = 20
+ANTIALIAS_CUTOFF = 0.8
+
+
+class RecordedChannels(dict):
+    """Kanal adı -> dizi benzeri sözlük; arkasındaki dosya tutamacını kapatabilir"""
+
+    def __init__(self, channels=None, handle=None):
+        super().__init__(channels or {})
+        self.handle = handle
+
+    def close(self):
+        """Açık dosya tutamacını (HDF5) kapat"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_sampling_rate(value):
+    """'1000 Hz' gibi bir örnekleme hızı değerini sayıya çevir"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    match = re.search(r'(\d+(?:[.,]\d+)?)', str(value))
+    if match:
+        return float(match.group(1).replace(',', '.'))
+    return None
+
+
+def load_recorded_channels(source):
+    """Kayıtlı analog kanalları aç (RecordedChannels, örnekleme hızı)
+
+    Diziler belleğe kopyalanmaz: NPY dosyaları memory-map ile, HDF5/Zarr
+    veri kümeleri ise tembel (lazy) olarak açılır ve dilimlenerek okunur.
+    İş bitince dönen kanallar close() ile kapatılmalıdır.
+    """
+    if isinstance(source, dict):
+        return RecordedChannels(source), None
+
+    if os.path.isdir(source) and not source.rstrip(os.sep).endswith('.zarr'):
+        # Her kanal ayrı bir .npy dosyası (IL1.npy, IL2.npy, ...)
+        channels = {}
+        for filename in sorted(os.listdir(source)):
+            if filename.lower().endswith('.npy'):
+                name = os.path.splitext(filename)[0]
+                channels[name] = np.load(os.path.join(source, filename), mmap_mode='r')
+        return RecordedChannels(channels), None
+
+    extension = os.path.splitext(source.rstrip(os.sep))[1].lower()
+
+    if extension == '.npy':
+        array = np.load(source, mmap_mode='r')
+        if array.ndim == 1:
+            return RecordedChannels({os.path.splitext(os.path.basename(source))[0]: array}), None
+        # (örnek sayısı, kanal sayısı) düzeninde tek dosya
+        return RecordedChannels({f'CH{i + 1}': array[:, i] for i in range(array.shape[1])}), None
+
+    if extension in ('.h5', '.hdf5'):
+        if not H5PY_AVAILABLE:
+            print("HDF5 için h5py gerekli! pip install h5py")
+            return RecordedChannels(), None
+        handle = h5py.File(source, 'r')
+        channels = {name: item for name, item in handle.items() if isinstance(item, h5py.Dataset)}
+        return RecordedChannels(channels, handle), parse_sampling_rate(handle.attrs.get('sampling_rate'))
+
+    if extension == '.zarr':
+        if not ZARR_AVAILABLE:
+            print("Zarr için zarr gerekli! pip install zarr")
+            return RecordedChannels(), None
+        group = zarr.open(source, mode='r')
+        channels = {name: array for name, array in group.arrays()}
+        return RecordedChannels(channels), parse_sampling_rate(group.attrs.get('sampling_rate'))
+
+    print(f"Desteklenmeyen kanal kaynağı: {source}")
+    return RecordedChannels(), None
+
+
+def decimation_step(sampling_rate, target_rate=None):
+    """Hedef çözünürlük için örnek atlama adımını hesapla"""
+    if not target_rate or not sampling_rate or target_rate >= sampling_rate:
+        return 1
+    return max(1, int(sampling_rate // target_rate))
+
+
+@lru_cache(maxsize=16)
+def _antialias_taps(step):
+    """Seyreltme adımı için FIR alçak geçiren filtre katsayıları (önbellekli)"""
+    taps = signal.firwin(ANTIALIAS_TAPS_PER_STEP * step + 1, ANTIALIAS_CUTOFF / step)
+    taps.setflags(write=False)
+    return taps
+
+
+def iter_channel_chunks(channels, sampling_rate, chunk_size=DEFAULT_CHUNK_SIZE, target_rate=None):
+    """Kanalları parça parça DataFrame olarak döndür (isteğe bağlı seyreltme ile)
+
+    Seyreltmede örnekler atlanmadan önce FIR alçak geçiren filtre uygulanır;
+    filtre durumu parçalar arasında taşındığından sonuç tek seferde
+    filtrelemeyle aynıdır. Filtre gecikmesi kadar ilk çıkışlar (ısınma)
+    atılır ve kayıt sonuna gecikme kadar sıfır eklenerek filtre boşaltılır;
+    böylece çıktı tam olarak [0, T) aralığını kapsar.
+    """
+    if not channels:
+        return
+
+    n_samples = min(len(array) for array in channels.values())
+    step = decimation_step(sampling_rate, target_rate)
+    if target_rate and target_rate < sampling_rate:
+        effective_rate = sampling_rate / step
+        if step == 1:
+            print(f"⚠️ {target_rate:g} Hz hedefi {sampling_rate:g} Hz'in tam böleni değil, tam hızda aktarılıyor.")
+        elif effective_rate != target_rate:
+            print(f"⚠️ {target_rate:g} Hz hedefi yerine {effective_rate:g} Hz ile aktarılıyor.")
+
+    # Parça sınırları adımın katı olsun ki seyreltme parçalar arasında kaymasın
+    chunk_size = max(step, (chunk_size // step) * step)
+
+    delay = 0
+    states = {}
+    if step > 1:
+        taps = _antialias_taps(step)
+        # Doğrusal fazlı FIR gecikmesi (len(taps) - 1) / 2 = 10 * step, yani adımın katıdır
+        delay = (len(taps) - 1) // 2
+        states = {name: np.zeros(len(taps) - 1) for name in channels}
+
+    # Filtre çıkışı m, giriş örneği m - delay'e karşılık gelir; girişin sonuna delay kadar sıfır eklenir
+    total = n_samples + delay
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        positions = np.arange(start, stop, step)
+        keep = positions >= delay  # ısınma çıkışlarını at (filtre durumu yine de güncellenir)
+        chunk = {'Zaman (s)': (positions[keep] - delay) / sampling_rate}
+        for name, array in channels.items():
+            if step > 1:
+                data = np.zeros(stop - start)
+                available = max(0, min(stop, n_samples) - start)
+                data[:available] = np.asarray(array[start:start + available], dtype=float)
+                filtered, states[name] = signal.lfilter(taps, 1.0, data, zi=states[name])
+                chunk[name] = filtered[::step][keep]
+            else:
+                chunk[name] = np.asarray(array[start:stop])
+        if keep.any():
+            yield pd.DataFrame(chunk)
+
+
+def write_channels_csv(channels, csv_path, sampling_rate, chunk_size=DEFAULT_CHUNK_SIZE, target_rate=None):
+    """Kanalları CSV dosyasına parça parça yaz, yazılan satır sayısını döndür"""
+    rows = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as file:
+        for i, chunk in enumerate(iter_channel_chunks(channels, sampling_rate, chunk_size, target_rate)):
+            chunk.to_csv(file, index=False, header=(i == 0))
+            rows += len(chunk)
+    return rows
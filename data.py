@@ -5,10 +5,15 @@ import matplotlib.pyplot as plt
 from PIL import Image
 import pandas as pd
 from datetime import datetime
-import re
 from scipy import signal
 import warnings
 import os
+import threading
+from channels import parse_sampling_rate
+from fault_classifier import FaultClassifier
+from spectral import SpectralAnalyzer
+from parsers import detect_parser, get_parser
+from ocr_layout import RegionLayoutCache, ocr_page
 warnings.filterwarnings('ignore')
 
 try:
@@ -34,14 +39,32 @@ except ImportError:
     OCR_AVAILABLE = False
     print("OCR için pytesseract yüklü değil. Kurulum: pip install pytesseract")
 
-class RelayFaultAnalyzer:
-    def __init__(self):
+class DocumentContext:
+    """Tek bir belgeye ait analiz durumu - her belge için yeni oluşturulur"""
+    def __init__(self, pdf_path=None):
+        self.pdf_path = pdf_path
+        self.parser = None
         self.original_images = []
         self.fault_data = {}
         self.binary_signals = {}
         self.analog_signals = {}
-        
-    def extract_text_from_pdf(self, pdf_path):
+
+    def close(self):
+        """Belgeye ait açık kaynakları (kanal dosyaları) kapat"""
+        if hasattr(self.analog_signals, 'close'):
+            self.analog_signals.close()
+
+class RelayFaultAnalyzer:
+    def __init__(self, layout_cache_path=None):
+        # Yalnızca belgeler arasında paylaşılan, bir kez kurulan yapılandırma.
+        # Belgeye özgü durum DocumentContext'te tutulur; böylece tek analizör
+        # birden çok belgeye (iş parçacıklarından da) hizmet edebilir.
+        self.fault_classifier = FaultClassifier()
+        self.spectral_analyzer = SpectralAnalyzer()
+        # OCR metin bölgesi yerleşimleri; yol verilirse süreçler arasında dosyada paylaşılır
+        self.layout_cache = RegionLayoutCache(layout_cache_path)
+        
+    def extract_text_from_pdf(self, pdf_path, template=None):
         """PDF'den metin çıkar - Çoklu yöntem deneme"""
         extracted_text = ""
         
@@ -85,9 +108,11 @@ class RelayFaultAnalyzer:
                 pages = pdf2image.convert_from_path(pdf_path, dpi=300)
                 
                 for page_num, page in enumerate(pages):
-                    # OCR uygula
-                    text = pytesseract.image_to_string(page, lang='tur+eng')
+                    # OCR uygula - yalnızca metin bölgeleri, şablon yerleşimi önbellekten
+                    text = ocr_page(np.array(page), page_num, template, self.layout_cache)
                     extracted_text += f"\n--- Sayfa {page_num + 1} (OCR) ---\n{text}"
+                # Yeni tespit edilen yerleşimleri sonraki belgeler için kaydet
+                self.layout_cache.save()
                 
                 if extracted_text.strip():
                     print(f"OCR ile {len(pages)} sayfa metin çıkarıldı.")
@@ -150,128 +175,25 @@ class RelayFaultAnalyzer:
             print(f"PDF okuma hatası: {e}")
             return None
     
-    def extract_fault_info(self, text_data):
-        """Arıza bilgilerini metin verisinden çıkar"""
-        fault_info = {
-            'device_name': '',
-            'fault_time': '',
-            'sampling_rate': '',
-            'cfg_file': '',
-            'file_path': '',
-            'record_type': '',
-            'cursor_values': {},
-            'active_protections': []
-        }
-        
-        # Metin verilerini analiz et
-        lines = text_data.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Cihaz adı
-            if 'H10_FIDER_H' in line and not fault_info['device_name']:
-                fault_info['device_name'] = 'H10_FIDER_H'
-            
-            # Arıza zamanı
-            if 'Start zamanı:' in line:
-                time_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4} \d{2}:\d{2}:\d{2})', line)
-                if time_match:
-                    fault_info['fault_time'] = time_match.group(1)
-            
-            # Örnekleme hızı
-            if 'Örnekleme hızı:' in line:
-                rate_match = re.search(r'(\d+) Hz', line)
-                if rate_match:
-                    fault_info['sampling_rate'] = rate_match.group(1) + ' Hz'
-            
-            # CFG dosyası
-            if '.CFG' in line and 'Dosya yolu' not in line:
-                fault_info['cfg_file'] = line.strip()
-            
-            # Dosya yolu
-            if 'Dosya yolu:' in line:
-                fault_info['file_path'] = line.replace('Dosya yolu:', '').strip()
-            
-            # Kayıt türü
-            if 'Kayıt türü:' in line:
-                fault_info['record_type'] = line.replace('Kayıt türü:', '').strip()
-            
-            # Kürsör değerleri
-            if 'Kürsör' in line and 'IL1' in line:
-                cursor_match = re.search(r'IL1 A (\d+,\d+) A (\d+,\d+) A', line)
-                if cursor_match:
-                    fault_info['cursor_values']['IL1_instant'] = cursor_match.group(1)
-                    fault_info['cursor_values']['IL1_rms'] = cursor_match.group(2)
-        
+    def extract_fault_info(self, text_data, parser=None):
+        """Arıza bilgilerini metin verisinden çıkar (format ayrıştırıcısı ile)"""
+        parser = parser or get_parser()
+        fault_info = parser.extract_fault_info(text_data)
+        fault_info['vendor'] = parser.vendor
         return fault_info
     
-    def identify_protection_functions(self, text_data):
-        """Aktif koruma fonksiyonlarını tespit et"""
-        protection_codes = {
-            '46': 'Faz Sırası/Negatif Sıra Koruma',
-            '46D': 'Faz Sırası Koruma - Açma',
-            '47O-': 'Gerilim Düşük Koruma',
-            '47U+': 'Gerilim Yüksek Koruma',
-            '49F': 'Termal Koruma',
-            '50': 'Ani Akım Koruma',
-            '51': 'Zaman Aşırı Akım Koruma',
-            '50N': 'Ani Toprak Koruma',
-            '51N': 'Zaman Aşırı Toprak Koruma',
-            '59': 'Aşırı Gerilim Koruma',
-            '59G': 'Toprak Aşırı Gerilim Koruma',
-            '60': 'Gerilim/Frekans Dengesizlik',
-            '67': 'Yönlü Aşırı Akım Koruma',
-            '67N': 'Yönlü Toprak Koruma',
-            '67NIEF': 'Yönlü Toprak Koruma (İnternal)',
-            '27': 'Az Gerilim Koruma',
-            '79': 'Otomatik Kapama/Açma',
-            '68': 'Blok Koruma'
-        }
-        
-        active_protections = []
-        lines = text_data.split('\n')
-        
-        for line in lines:
-            for code, description in protection_codes.items():
-                if code in line:
-                    # Aktif olup olmadığını kontrol et
-                    status = self._check_protection_status(line, code)
-                    active_protections.append({
-                        'code': code,
-                        'description': description,
-                        'status': status,
-                        'line': line.strip()
-                    })
-        
-        return active_protections
+    def identify_protection_functions(self, text_data, parser=None):
+        """Aktif koruma fonksiyonlarını tespit et (format ayrıştırıcısı ile)"""
+        return (parser or get_parser()).identify_protection_functions(text_data)
     
-    def _check_protection_status(self, line, code):
-        """Koruma fonksiyonunun durumunu kontrol et"""
-        status_keywords = {
-            'pick up': 'Başlama',
-            'trip': 'Açma',
-            'OPER': 'Çalışma',
-            'ACMA': 'Açma',
-            'KAPALI': 'Kapalı',
-            'ACIK': 'Açık',
-            'AKTIF': 'Aktif',
-            'HAZIR': 'Hazır'
-        }
-        
-        for keyword, status in status_keywords.items():
-            if keyword in line.upper():
-                return status
-        
-        return 'Tespit Edildi'
-    
-    def extract_signal_data_from_image(self, image_index=1):
+    def extract_signal_data_from_image(self, image_index=1, context=None):
         """Görüntüden sinyal verilerini çıkar (Ana sinyal sayfası)"""
-        if image_index >= len(self.original_images):
+        context = context or DocumentContext()
+        if image_index >= len(context.original_images):
             print("Belirtilen sayfa bulunamadı!")
             return None
         
-        img = self.original_images[image_index]
+        img = context.original_images[image_index]
         
         # Görüntüyü ön işle
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -300,34 +222,41 @@ class RelayFaultAnalyzer:
                         'area': cv2.contourArea(contour)
                     })
         
-    def pdf_to_images(self, pdf_path, dpi=300):
-        """PDF'in tüm sayfalarını görüntüye çevir"""
+    def pdf_to_images(self, pdf_path, dpi=300, context=None):
+        """PDF'in tüm sayfalarını görüntüye çevir (görüntüler belge bağlamında tutulur)"""
         if not PDF2IMAGE_AVAILABLE:
             print("pdf2image kütüphanesi gerekli! pip install pdf2image")
             return None
             
         try:
             pages = pdf2image.convert_from_path(pdf_path, dpi=dpi)
-            self.original_images = []
+            images = []
             
             for i, page in enumerate(pages):
                 img = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2BGR)
-                self.original_images.append(img)
+                images.append(img)
                 
+            if context is not None:
+                context.original_images = images
             print(f"PDF başarıyla {len(pages)} sayfaya çevrildi.")
-            return self.original_images
+            return images
             
         except Exception as e:
             print(f"PDF okuma hatası: {e}")
             return None
     
-    def analyze_pdf_complete(self, pdf_path):
+    def analyze_pdf_complete(self, pdf_path, visualize=True):
         """PDF'i tam analiz et - metin + görüntü"""
         print("🔍 PDF analizi başlatılıyor...")
+        context = DocumentContext(pdf_path)
         
-        # 1. PDF'den metin çıkar
+        # 1. Kayıt formatını tespit et (yalnızca ilk sayfa)
+        context.parser = detect_parser(pdf_path)
+        print(f"🏷️ Tespit edilen format: {context.parser.vendor}")
+
+        # 2. PDF'den metin çıkar
         print("\n📄 Metin çıkarılıyor...")
-        raw_text = self.extract_text_from_pdf(pdf_path)
+        raw_text = self.extract_text_from_pdf(pdf_path, context.parser.name)
         
         if raw_text:
             # Metni temizle
@@ -335,9 +264,9 @@ class RelayFaultAnalyzer:
             print(f"✅ Toplam {len(cleaned_text)} karakter metin çıkarıldı.")
             
             # Metin analizi yap
-            fault_info = self.extract_fault_info(cleaned_text)
-            protection_data = self.identify_protection_functions(cleaned_text)
-            analysis = self.analyze_fault_sequence(fault_info, protection_data)
+            fault_info = self.extract_fault_info(cleaned_text, context.parser)
+            protection_data = self.identify_protection_functions(cleaned_text, context.parser)
+            analysis = self.analyze_fault_sequence(fault_info, protection_data, context)
             
             # Sonuçları göster
             print("\n" + "="*60)
@@ -349,7 +278,8 @@ class RelayFaultAnalyzer:
             print(report)
             
             # Görselleştir
-            self.visualize_analysis(fault_info, protection_data, analysis)
+            if visualize:
+                self.visualize_analysis(fault_info, protection_data, analysis)
             
             return {
                 'extracted_text': cleaned_text,
@@ -362,8 +292,9 @@ class RelayFaultAnalyzer:
             print("❌ PDF'den metin çıkarılamadı!")
             return None
     
-    def analyze_fault_sequence(self, fault_info, protection_data):
+    def analyze_fault_sequence(self, fault_info, protection_data, context=None):
         """Arıza sırasını ve nedenini analiz et"""
+        context = context or DocumentContext()
         analysis = {
             'fault_summary': {},
             'probable_cause': '',
@@ -383,8 +314,16 @@ class RelayFaultAnalyzer:
         trip_protections = [p for p in protection_data if 'trip' in p['status'].lower() or 'açma' in p['status'].lower()]
         pickup_protections = [p for p in protection_data if 'pick up' in p['status'].lower() or 'başlama' in p['status'].lower()]
         
+        # Analog kanallardan arıza tipini sınıflandır
+        analysis['fault_type'] = self._classify_analog_fault(fault_info, context)
+
+        # Harmonik / spektral analiz
+        analysis['spectral'] = self.spectral_analyzer.analyze(context.analog_signals,
+                                                              self._sampling_rate_hz(fault_info, context))
+
         # Arıza nedenini tahmin et
-        cause_analysis = self._determine_fault_cause(trip_protections, pickup_protections, fault_info)
+        cause_analysis = self._determine_fault_cause(trip_protections, pickup_protections, fault_info,
+                                                     analysis['fault_type'])
         analysis['probable_cause'] = cause_analysis
         
         # Koruma sırası
@@ -395,9 +334,22 @@ class RelayFaultAnalyzer:
         
         return analysis
     
-    def _determine_fault_cause(self, trip_protections, pickup_protections, fault_info):
+    def _sampling_rate_hz(self, fault_info, context):
+        """Kanal kaynağından ya da metinden okunan örnekleme hızını Hz olarak döndür"""
+        return (context.fault_data.get('sampling_rate_hz')
+                or parse_sampling_rate(fault_info.get('sampling_rate')))
+
+    def _classify_analog_fault(self, fault_info, context):
+        """Kayıtlı IL1/IL2/IL3 (ve gerilim) kanallarından arıza tipini belirle"""
+        return self.fault_classifier.classify_record(context.analog_signals, self._sampling_rate_hz(fault_info, context))
+
+    def _determine_fault_cause(self, trip_protections, pickup_protections, fault_info, fault_type=None):
         """Arıza nedenini belirle"""
         causes = []
+
+        # Analog sinyal sınıflandırması varsa en başa koy
+        if fault_type and fault_type != 'Belirsiz':
+            causes.append(f"{fault_type} (analog sinyal analizi)")
         
         # Koruma kodlarına göre analiz
         protection_codes = [p['code'] for p in trip_protections + pickup_protections]
@@ -493,10 +445,12 @@ class RelayFaultAnalyzer:
 • CFG Dosyası: {fault_info.get('cfg_file', 'Bilinmiyor')}
 • Örnekleme Hızı: {fault_info.get('sampling_rate', 'Bilinmiyor')}
 • Kayıt Türü: {fault_info.get('record_type', 'Bilinmiyor')}
+• Kayıt Formatı: {fault_info.get('vendor', 'Bilinmiyor')}
 
 ⚡ ARIZA ÖZETİ:
 ───────────────────────────────────────────────────────────────
 • Muhtemel Neden: {analysis['probable_cause']}
+• Arıza Tipi (Analog): {analysis.get('fault_type') or 'Bilinmiyor'}
 • Arıza Süresi: {analysis['fault_summary']['duration']}
 
 🛡️ AKTİF KORUMA FONKSİYONLARI:
@@ -531,7 +485,29 @@ class RelayFaultAnalyzer:
 • IL1 Anlık Değer: {fault_info.get('cursor_values', {}).get('IL1_instant', 'Bilinmiyor')} A
 • IL1 Etkin Değer: {fault_info.get('cursor_values', {}).get('IL1_rms', 'Bilinmiyor')} A
 • Zaman Aralığı: 0-2 saniye
-• Faz Sayısı: 3 (IL1, IL2, IL3)
+• Faz Sayısı: 3 (IL1, IL2, IL3)"""
+
+        # Harmonik analizini listele
+        spectral = analysis.get('spectral')
+        if spectral is not None:
+            report += """
+
+🔊 HARMONİK ANALİZİ:
+───────────────────────────────────────────────────────────────"""
+            for _, row in spectral['summary'].iterrows():
+                dc_tau = row['DC Sönüm Sabiti (ms)']
+                dc_text = f"{dc_tau:.0f} ms" if not np.isnan(dc_tau) else "-"
+                # Temel bileşeni anlamsız kanallarda (gürültü, ikili) oranlar NaN gelir
+                h2, h5, thd = (f"{value:5.1f}%" if not np.isnan(value) else "    -"
+                               for value in (row['2. Harmonik Maks (%)'], row['5. Harmonik Maks (%)'],
+                                             row['THD Maks (%)']))
+                report += f"\n• {row['Kanal']:6s} | H2: {h2} | H5: {h5} | THD: {thd} | DC τ: {dc_text}"
+                if row['Inrush Şüphesi']:
+                    report += " | Inrush şüphesi"
+                if row['Aşırı Uyarma Şüphesi']:
+                    report += " | Aşırı uyarma şüphesi"
+
+        report += f"""
 
 ═══════════════════════════════════════════════════════════════
 Rapor Oluşturma Zamanı: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
@@ -599,11 +575,36 @@ DURUM: ANALİZ TAMAMLANDI ✓
         plt.tight_layout()
         plt.show()
 
+# Paylaşılan analizör - yapılandırma bir kez kurulur, belgeler arasında yeniden kullanılır
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+# matplotlib pyplot iş parçacığı güvenli değildir; grafikler tek tek çizilir
+_plot_lock = threading.Lock()
+
+def get_shared_analyzer():
+    """Süreç genelinde tek RelayFaultAnalyzer örneğini döndür (ilk çağrıda oluştur)"""
+    global _shared_analyzer
+    with _shared_analyzer_lock:
+        if _shared_analyzer is None:
+            _shared_analyzer = RelayFaultAnalyzer()
+        return _shared_analyzer
+
+def plot_analysis_results(results):
+    """Analiz sonucunu görselleştir (paylaşılan analizörün dışında, kilit altında)"""
+    with _plot_lock:
+        get_shared_analyzer().visualize_analysis(results['fault_info'], results['protection_data'], results['analysis'])
+
 # Ana analiz fonksiyonu - Güncellenmiş
-def analyze_relay_fault_from_pdf(pdf_path):
-    """PDF dosyasından röle arıza kaydını tam analiz et"""
-    analyzer = RelayFaultAnalyzer()
-    return analyzer.analyze_pdf_complete(pdf_path)
+def analyze_relay_fault_from_pdf(pdf_path, visualize=True):
+    """PDF dosyasından röle arıza kaydını tam analiz et
+
+    Paylaşılan analizör grafik çizmeden çalışır; visualize=True ise grafik
+    analiz bittikten sonra çizilir.
+    """
+    results = get_shared_analyzer().analyze_pdf_complete(pdf_path, visualize=False)
+    if results and visualize:
+        plot_analysis_results(results)
+    return results
 
 # Kullanım örneği - Sadece PDF Analizi
 if __name__ == "__main__":
@@ -643,6 +644,6 @@ if __name__ == "__main__":
         traceback.print_exc()
 
 # Hızlı kullanım fonksiyonu
-def quick_analyze(pdf_path):
+def quick_analyze(pdf_path, visualize=True):
     """Hızlı analiz için"""
-    return analyze_relay_fault_from_pdf(pdf_path)
\ No newline at end of file
+    return analyze_relay_fault_from_pdf(pdf_path, visualize)
\ No newline at end of file
@@ -1,14 +1,28 @@
-from data import RelayFaultAnalyzer
+from data import DocumentContext, RelayFaultAnalyzer, get_shared_analyzer, plot_analysis_results
+from channels import DEFAULT_CHUNK_SIZE, load_recorded_channels, write_channels_csv
+from parsers import detect_parser
+from batch import document_folder
 import pandas as pd
-import numpy as np
 from datetime import datetime
 import os
 
-def export_analysis_to_csv(self, fault_info, protection_data, analysis, foldername=None):
+def export_analysis_to_csv(self, fault_info, protection_data, analysis, foldername=None,
+                           target_rate=None, chunk_size=DEFAULT_CHUNK_SIZE, context=None):
     """Analiz sonuçlarını CSV dosyalarına aktar"""
 
     if foldername is None:
-        foldername = f"rele_ariza_csv_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Paylaşılan analizörle eşzamanlı belgeler aynı klasöre yazmasın: belge adı + yol özeti + mikrosaniye
+        document = f"{document_folder('', context.pdf_path)}_" if context and context.pdf_path else ''
+        base = f"rele_ariza_csv_{document}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        # Aynı belge aynı anda iki kez analiz edilirse klasörü atomik olarak ayır
+        foldername, attempt = base, 1
+        while True:
+            try:
+                os.makedirs(foldername)
+                break
+            except FileExistsError:
+                attempt += 1
+                foldername = f"{base}_{attempt}"
     
     os.makedirs(foldername, exist_ok=True)
 
@@ -60,21 +74,24 @@ def export_analysis_to_csv(self, fault_info, protection_data, analysis, folderna
         ])
         recommendations_df.to_csv(os.path.join(foldername, 'oneriler.csv'), index=False)
 
-    # 5. Simülasyon Verileri
-    time_points = np.linspace(0, 2, 100)
-    il1_current = 150 * np.sin(2*np.pi*50*time_points) * np.exp(-time_points/0.5)
-    il2_current = 145 * np.sin(2*np.pi*50*time_points + 2*np.pi/3) * np.exp(-time_points/0.5)
-    il3_current = 155 * np.sin(2*np.pi*50*time_points - 2*np.pi/3) * np.exp(-time_points/0.5)
-
-    simulation_df = pd.DataFrame({
-        'Zaman (s)': time_points,
-        'IL1 Akım (A)': il1_current,
-        'IL2 Akım (A)': il2_current,
-        'IL3 Akım (A)': il3_current,
-        'Pickup Zamanı': [0.1 if abs(t - 0.1) < 0.01 else '' for t in time_points],
-        'Trip Zamanı': [0.3 if abs(t - 0.3) < 0.01 else '' for t in time_points]
-    })
-    simulation_df.to_csv(os.path.join(foldername, 'zaman_serisi.csv'), index=False)
+    # 5. Zaman Serisi (kayıtlı analog kanallar, parça parça)
+    context = context or DocumentContext()
+    if context.analog_signals:
+        sampling_rate = self._sampling_rate_hz(fault_info, context)
+        if sampling_rate:
+            rows = write_channels_csv(context.analog_signals, os.path.join(foldername, 'zaman_serisi.csv'),
+                                      sampling_rate, chunk_size=chunk_size, target_rate=target_rate)
+            print(f"📈 Zaman serisi yazıldı: {rows} satır, {len(context.analog_signals)} kanal")
+        else:
+            print("⚠️ Örnekleme hızı bilinmiyor, zaman_serisi.csv atlandı.")
+    else:
+        print("⚠️ Kayıtlı analog kanal yok, zaman_serisi.csv atlandı.")
+
+    # 6. Harmonik Analizi
+    spectral = analysis.get('spectral')
+    if spectral is not None:
+        spectral['summary'].to_csv(os.path.join(foldername, 'harmonik_ozeti.csv'), index=False)
+        self.spectral_analyzer.to_dataframe(spectral).to_csv(os.path.join(foldername, 'harmonikler.csv'), index=False)
 
     print(f"✅ CSV klasörü oluşturuldu: {foldername}")
     return foldername
@@ -83,53 +100,74 @@ def export_analysis_to_csv(self, fault_info, protection_data, analysis, folderna
 RelayFaultAnalyzer.export_to_csv = export_analysis_to_csv
 
 # Güncellenmiş analyze_pdf_complete metodunu değiştir
-def analyze_pdf_complete_with_csv(self, pdf_path, export_csv=True):
+def analyze_pdf_complete_with_csv(self, pdf_path, export_csv=True, channel_source=None, target_rate=None,
+                                  csv_folder=None, visualize=True):
     """PDF'i analiz et ve CSV'e aktar"""
     print("🔍 PDF analizi başlatılıyor...")
+    context = DocumentContext(pdf_path)
+
+    if channel_source is not None:
+        context.analog_signals, channel_rate = load_recorded_channels(channel_source)
+        if channel_rate:
+            context.fault_data['sampling_rate_hz'] = channel_rate
     
-    raw_text = self.extract_text_from_pdf(pdf_path)
+    try:
+        context.parser = detect_parser(pdf_path)
+        print(f"🏷️ Tespit edilen format: {context.parser.vendor}")
 
-    if raw_text:
-        cleaned_text = self.clean_extracted_text(raw_text)
-        print(f"✅ Toplam {len(cleaned_text)} karakter metin çıkarıldı.")
+        raw_text = self.extract_text_from_pdf(pdf_path, context.parser.name)
+
+        if raw_text:
+            cleaned_text = self.clean_extracted_text(raw_text)
+            print(f"✅ Toplam {len(cleaned_text)} karakter metin çıkarıldı.")
         
-        fault_info = self.extract_fault_info(cleaned_text)
-        protection_data = self.identify_protection_functions(cleaned_text)
-        analysis = self.analyze_fault_sequence(fault_info, protection_data)
+            fault_info = self.extract_fault_info(cleaned_text, context.parser)
+            protection_data = self.identify_protection_functions(cleaned_text, context.parser)
+            analysis = self.analyze_fault_sequence(fault_info, protection_data, context)
         
-        print("\n" + "="*60)
-        print("📊 RÖLE ARIZA ANALİZİ TAMAMLANDI")
-        print("="*60)
+            print("\n" + "="*60)
+            print("📊 RÖLE ARIZA ANALİZİ TAMAMLANDI")
+            print("="*60)
         
-        report = self.generate_report(fault_info, protection_data, analysis)
-        print(report)
+            report = self.generate_report(fault_info, protection_data, analysis)
+            print(report)
 
-        self.visualize_analysis(fault_info, protection_data, analysis)
+            if visualize:
+                self.visualize_analysis(fault_info, protection_data, analysis)
         
-        csv_folder = None
-        if export_csv:
-            print("\n📁 CSV dosyaları oluşturuluyor...")
-            csv_folder = self.export_to_csv(fault_info, protection_data, analysis)
+            if export_csv:
+                print("\n📁 CSV dosyaları oluşturuluyor...")
+                csv_folder = self.export_to_csv(fault_info, protection_data, analysis, csv_folder,
+                                                target_rate=target_rate, context=context)
+            else:
+                csv_folder = None
         
-        return {
-            'extracted_text': cleaned_text,
-            'fault_info': fault_info,
-            'protection_data': protection_data,
-            'analysis': analysis,
-            'report': report,
-            'csv_folder': csv_folder
-        }
-    else:
-        print("❌ PDF'den metin çıkarılamadı!")
-        return None
+            return {
+                'extracted_text': cleaned_text,
+                'fault_info': fault_info,
+                'protection_data': protection_data,
+                'analysis': analysis,
+                'report': report,
+                'csv_folder': csv_folder
+            }
+        else:
+            print("❌ PDF'den metin çıkarılamadı!")
+            return None
+    finally:
+        # HDF5 gibi kanal kaynaklarının dosya tutamacını bırak
+        context.close()
 
 # Sınıfa yeni metodu ekle
 RelayFaultAnalyzer.analyze_pdf_complete_with_csv = analyze_pdf_complete_with_csv
 
 # Ana fonksiyon
-def analyze_relay_fault_from_pdf_with_csv(pdf_path, export_csv=True):
-    analyzer = RelayFaultAnalyzer()
-    return analyzer.analyze_pdf_complete_with_csv(pdf_path, export_csv)
+def analyze_relay_fault_from_pdf_with_csv(pdf_path, export_csv=True, channel_source=None, target_rate=None,
+                                          visualize=True):
+    results = get_shared_analyzer().analyze_pdf_complete_with_csv(pdf_path, export_csv, channel_source, target_rate,
+                                                                  visualize=False)
+    if results and visualize:
+        plot_analysis_results(results)
+    return results
 
 # Kullanım
 if __name__ == "__main__":
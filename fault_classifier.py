@@ -0,0 +1,328 @@
+# Analog Sinyallerden Arıza Tipi Sınıflandırma - Toplu (vektörel) çıkarım
+import numpy as np
+import pandas as pd
+
+from channels import parse_sampling_rate
+
+FAULT_TYPES = {
+    'SLG': 'Faz-Toprak Arızası',
+    'LL': 'Faz-Faz Arızası',
+    'LLL': 'Üç Faz Arızası',
+    'EVOLVING': 'Gelişen Arıza',
+    'HIZ': 'Yüksek Empedanslı Arıza',
+    'UNKNOWN': 'Belirsiz'
+}
+
+CURRENT_CHANNELS = ('IL1', 'IL2', 'IL3')
+VOLTAGE_CHANNELS = (('UL1', 'UL2', 'UL3'), ('VL1', 'VL2', 'VL3'), ('V1', 'V2', 'V3'))
+
+# Simetrili bileşen operatörü
+A_OP = np.exp(2j * np.pi / 3)
+
+# Arıza başlangıcı taranırken tek seferde okunan periyot sayısı - kayıt belleğe tümüyle alınmaz
+CYCLES_PER_CHUNK = 1000
+# Başlangıç tespitinde bu orandan küçük genlikler gürültü sayılır (kaydın en büyük genliğine göre)
+ONSET_FLOOR_RATIO = 0.05
+
+
+def _cycle_spectra(signals, sampling_rate, frequency):
+    """(kayıt, faz, örnek) dizisini periyotlara bölüp her periyodun FFT'sini al"""
+    samples_per_cycle = int(round(sampling_rate / frequency))
+    n_cycles = signals.shape[-1] // samples_per_cycle
+    cycles = signals[..., :n_cycles * samples_per_cycle].reshape(
+        signals.shape[:-1] + (n_cycles, samples_per_cycle))
+    # (kayıt, faz, periyot, harmonik) - 2/N ile tepe genliğine ölçekle
+    spectra = np.fft.rfft(cycles, axis=-1) * (2.0 / samples_per_cycle)
+    spectra[..., 0] /= 2.0
+    return spectra
+
+
+def _take_cycle(array, index):
+    """(kayıt, faz, periyot, ...) dizisinden her kayıt için verilen periyodu seç"""
+    index = index.reshape((-1,) + (1,) * (array.ndim - 1))
+    return np.take_along_axis(array, index, axis=2)[:, :, 0]
+
+
+def stack_records(records, n_samples, channel_names=CURRENT_CHANNELS, offsets=None):
+    """Kayıtları aynı uzunlukta (kayıt, faz, örnek) dizisine yığ (kısa olanları sıfırla doldur)
+
+    offsets verilirse her kayıttan o örnekten başlayan pencere alınır.
+    """
+    stacked = np.zeros((len(records), len(channel_names), n_samples))
+    for i, channels in enumerate(records):
+        start = int(offsets[i]) if offsets is not None else 0
+        for j, name in enumerate(channel_names):
+            data = np.asarray(channels[name][start:start + n_samples], dtype=float)
+            stacked[i, j, :len(data)] = data
+    return stacked
+
+
+def cycle_phasors(channels, sampling_rate, frequency, channel_names=CURRENT_CHANNELS, harmonics=(1, 3),
+                  chunk_cycles=CYCLES_PER_CHUNK):
+    """Kaydın tamamı için periyot başına harmonik fazörlerini parça parça hesapla -> (harmonik, faz, periyot)
+
+    Örnekleme hızının izin vermediği (Nyquist üstü) harmonikler atlanır.
+    """
+    samples_per_cycle = int(round(sampling_rate / frequency))
+    harmonics = [h for h in harmonics if h <= samples_per_cycle // 2]
+    n_cycles = min(len(channels[name]) for name in channel_names) // samples_per_cycle
+    kernel = np.exp(-2j * np.pi * np.outer(np.arange(samples_per_cycle), harmonics) / samples_per_cycle)
+    kernel *= 2.0 / samples_per_cycle
+
+    phasors = np.empty((len(harmonics), len(channel_names), n_cycles), dtype=complex)
+    for first in range(0, n_cycles, chunk_cycles):
+        last = min(first + chunk_cycles, n_cycles)
+        for j, name in enumerate(channel_names):
+            data = np.asarray(channels[name][first * samples_per_cycle:last * samples_per_cycle], dtype=float)
+            phasors[:, j, first:last] = (data.reshape(-1, samples_per_cycle) @ kernel).T
+    return phasors
+
+
+def find_voltage_channels(channels):
+    """Kayıttaki faz gerilimi kanal adlarını bul"""
+    for names in VOLTAGE_CHANNELS:
+        if all(name in channels for name in names):
+            return names
+    return None
+
+
+class FaultClassifier:
+    def __init__(self, frequency=50, rise_ratio=2.0, zero_seq_ratio=0.2, negative_seq_ratio=0.3,
+                 hiz_zero_seq_ratio=0.1, hiz_harmonic_ratio=0.05, voltage_sag_ratio=0.9, window_cycles=25,
+                 prefault_cycles=5):
+        self.frequency = frequency
+        self.rise_ratio = rise_ratio
+        self.zero_seq_ratio = zero_seq_ratio
+        self.negative_seq_ratio = negative_seq_ratio
+        self.hiz_zero_seq_ratio = hiz_zero_seq_ratio
+        self.hiz_harmonic_ratio = hiz_harmonic_ratio
+        self.voltage_sag_ratio = voltage_sag_ratio
+        self.window_cycles = window_cycles
+        self.prefault_cycles = prefault_cycles
+
+    def detect_onset(self, phasors):
+        """cycle_phasors çıktısında arıza başlangıç periyodunu bul (yoksa None)
+
+        Herhangi bir fazın genliği iki periyot öncesine göre rise_ratio katını
+        aştığı, ya da artık akımın temel bileşeni / 3. harmoniği yüksek empedans
+        eşiklerinden fazla arttığı ilk periyot başlangıç kabul edilir. İki
+        periyotluk fark, arızanın periyot ortasında başlamasıyla oluşan kısmi
+        periyodu da kapsar.
+        """
+        magnitudes = np.abs(phasors[0])
+        if magnitudes.shape[1] < 3:
+            return None
+        floor = max(ONSET_FLOOR_RATIO * magnitudes.max(), np.finfo(float).eps)
+        jumps = magnitudes[:, 2:] / np.maximum(magnitudes[:, :-2], floor)
+        rising = (jumps > self.rise_ratio).any(axis=0)
+
+        # Aşırı akım oluşturmayan (yüksek empedanslı) arızalar artık akımdaki artışla görünür
+        scale = np.maximum(magnitudes[:, :-2].mean(axis=0), floor)
+        residual = np.abs(phasors.sum(axis=1))             # (harmonik, periyot)
+        residual_rise = (residual[:, 2:] - residual[:, :-2]) / scale
+        rising |= residual_rise[0] / 3 > self.hiz_zero_seq_ratio
+        if len(residual_rise) > 1:
+            rising |= residual_rise[1] > self.hiz_harmonic_ratio
+        if not rising.any():
+            return None
+        return int(rising.argmax()) + 2
+
+    def extract_features(self, currents, sampling_rate, voltages=None, onset=None):
+        """(kayıt, 3, örnek) akım dizisinden öznitelikleri tüm kayıtlar için tek seferde çıkar
+
+        onset: pencere içinde arıza başlangıç periyodu (kayıt başına); öncesindeki
+        periyotlar ön-arıza referansı olur. Verilmezse ilk periyot referans alınır.
+        """
+        currents = np.asarray(currents, dtype=float)
+        spectra = _cycle_spectra(currents, sampling_rate, self.frequency)
+        eps = np.finfo(float).eps
+
+        fundamental = spectra[..., 1]                      # (kayıt, faz, periyot)
+        magnitude = np.abs(fundamental)
+        n_cycles = magnitude.shape[2]
+        onset = np.zeros(len(currents), dtype=int) if onset is None else np.clip(np.asarray(onset, dtype=int), 0, n_cycles - 1)
+
+        # Ön-arıza periyotları: başlangıçtan öncekiler (başlangıç ilk periyotsa yalnızca o)
+        cycle_index = np.arange(n_cycles)
+        prefault_mask = (cycle_index[None, :] < onset[:, None]) | ((onset[:, None] == 0) & (cycle_index[None, :] == 0))
+        prefault_mask = prefault_mask[:, None, :]
+        prefault = np.nanmedian(np.where(prefault_mask, magnitude, np.nan), axis=2)
+        # Yüksüz hatlarda sıfıra yakın ön-arıza akımı oranları patlatmasın
+        reference = np.maximum(prefault, np.median(prefault, axis=1, keepdims=True)) + eps
+
+        # Arıza periyodu: başlangıçtan sonra üç faz toplam genliğinin en büyük olduğu periyot
+        after_onset = cycle_index[None, :] >= onset[:, None]
+        peak_cycle = np.where(after_onset, magnitude.sum(axis=1), -np.inf).argmax(axis=1)
+        fault_phasors = _take_cycle(fundamental, peak_cycle)
+        fault_magnitude = np.abs(fault_phasors)
+        rise = fault_magnitude / reference
+
+        ia, ib, ic = fault_phasors[:, 0], fault_phasors[:, 1], fault_phasors[:, 2]
+        i0 = np.abs(ia + ib + ic) / 3
+        i1 = np.abs(ia + A_OP * ib + A_OP ** 2 * ic) / 3 + eps
+        i2 = np.abs(ia + A_OP ** 2 * ib + A_OP * ic) / 3
+
+        # Harmonikler ve DC bileşen (arıza periyodunda)
+        fault_spectrum = _take_cycle(spectra, peak_cycle)  # (kayıt, faz, harmonik)
+        harmonic_power = (np.abs(fault_spectrum[..., 2:]) ** 2).sum(axis=-1)
+        thd = np.sqrt(harmonic_power) / (fault_magnitude + eps)
+        dc_offset = np.abs(fault_spectrum[..., 0].real) / (fault_magnitude + eps)
+
+        # Artık (rezidüel) akımın 3. harmoniği - yüksek empedanslı arıza göstergesi
+        residual = spectra.sum(axis=1)                     # (kayıt, periyot, harmonik)
+        residual_h3_cycles = np.abs(residual[..., 3]) if residual.shape[-1] > 3 else np.zeros(residual.shape[:2])
+        residual_h3 = residual_h3_cycles.max(axis=1)
+
+        # Dengesiz yük ve sürekli üçlü harmonikler arızadan önce de vardır;
+        # yüksek empedans için ön-arıza periyotlarına göre artış kullanılır
+        i0_cycles = np.abs(residual[..., 1]) / 3
+        i0_prefault = np.nanmedian(np.where(prefault_mask[:, 0, :], i0_cycles, np.nan), axis=1)
+        h3_prefault = np.nanmedian(np.where(prefault_mask[:, 0, :], residual_h3_cycles, np.nan), axis=1)
+        h3_after = np.where(after_onset, residual_h3_cycles, -np.inf).max(axis=1)
+
+        # Arızalı faz kümesinin zaman içindeki değişimi (gelişen arıza)
+        faulted = (magnitude > self.rise_ratio * reference[:, :, None]) & after_onset[:, None, :]
+        faulted_count = faulted.sum(axis=1)                # (kayıt, periyot)
+        # Arıza başlangıcındaki kısmi periyodu atlamak için bir sonraki periyoda bak
+        first_cycle = np.minimum((faulted_count > 0).argmax(axis=1) + 1, peak_cycle)
+        first_set = _take_cycle(faulted[..., None], first_cycle)[..., 0]
+        peak_set = _take_cycle(faulted[..., None], peak_cycle)[..., 0]
+
+        features = {
+            'rise_L1': rise[:, 0], 'rise_L2': rise[:, 1], 'rise_L3': rise[:, 2],
+            'faulted_phases': (rise > self.rise_ratio).sum(axis=1),
+            'zero_seq_ratio': i0 / i1,
+            'negative_seq_ratio': i2 / i1,
+            'thd_max': thd.max(axis=1),
+            'dc_offset_max': dc_offset.max(axis=1),
+            'residual_h3_ratio': residual_h3 / (fault_magnitude.mean(axis=1) + eps),
+            'zero_seq_rise': (i0 - i0_prefault) / i1,
+            'residual_h3_rise': (h3_after - h3_prefault) / (fault_magnitude.mean(axis=1) + eps),
+            'evolving': (first_set != peak_set).any(axis=1) & (peak_set.sum(axis=1) > first_set.sum(axis=1)),
+            'fault_cycle': peak_cycle
+        }
+
+        if voltages is not None:
+            v_magnitude = np.abs(_cycle_spectra(np.asarray(voltages, dtype=float), sampling_rate, self.frequency)[..., 1])
+            v_fault = _take_cycle(v_magnitude, peak_cycle)
+            v_prefault = np.nanmedian(np.where(prefault_mask, v_magnitude, np.nan), axis=2)
+            sag = v_fault / (v_prefault + eps)
+            features['voltage_sag_min'] = sag.min(axis=1)
+            features['sagged_phases'] = (sag < self.voltage_sag_ratio).sum(axis=1)
+
+        return pd.DataFrame(features)
+
+    def predict(self, features):
+        """Öznitelik tablosundan arıza tiplerini kural tabanlı ve vektörel olarak belirle"""
+        faulted = features['faulted_phases'].to_numpy()
+        zero_seq = features['zero_seq_ratio'].to_numpy()
+        negative_seq = features['negative_seq_ratio'].to_numpy()
+        evolving = features['evolving'].to_numpy()
+        if 'sagged_phases' in features:
+            # Akım artışı olmasa da gerilim çöken fazlar arızalı sayılır
+            faulted = np.maximum(faulted, features['sagged_phases'].to_numpy())
+
+        no_overcurrent = features['faulted_phases'].to_numpy() == 0
+        high_impedance = no_overcurrent & (
+            (features['zero_seq_rise'].to_numpy() > self.hiz_zero_seq_ratio)
+            | (features['residual_h3_rise'].to_numpy() > self.hiz_harmonic_ratio))
+
+        conditions = [
+            evolving & (faulted > 0),
+            (faulted >= 3) & (zero_seq < self.zero_seq_ratio) & (negative_seq < self.negative_seq_ratio),
+            (faulted == 1) & (zero_seq >= self.zero_seq_ratio),
+            (faulted >= 2) & (negative_seq >= self.negative_seq_ratio),
+            high_impedance
+        ]
+        choices = ['EVOLVING', 'LLL', 'SLG', 'LL', 'HIZ']
+        return np.select(conditions, choices, default='UNKNOWN')
+
+    def locate_windows(self, records, sampling_rate):
+        """Her kaydın tamamında arıza başlangıcını bulup analiz penceresinin ilk periyodunu belirle
+
+        Başlangıç bulunamazsa (ör. yüksek empedanslı arıza) pencere en büyük akımın çevresine alınır.
+        Dönüş: (pencere başlangıç periyotları, pencere içi başlangıç periyotları, başlangıç bulundu mu)
+        """
+        starts = np.zeros(len(records), dtype=int)
+        onsets = np.zeros(len(records), dtype=int)
+        detected = np.zeros(len(records), dtype=bool)
+        for i, channels in enumerate(records):
+            phasors = cycle_phasors(channels, sampling_rate, self.frequency)
+            magnitudes = np.abs(phasors[0])
+            if magnitudes.shape[1] == 0:
+                continue
+            onset = self.detect_onset(phasors)
+            if onset is None:
+                peak = int(magnitudes.sum(axis=0).argmax())
+                starts[i] = max(0, min(peak - self.window_cycles // 2, magnitudes.shape[1] - self.window_cycles))
+                continue
+            # Kayıt sonuna yakın başlangıçlarda pencereyi geriye kaydır, ön-arıza periyotları artar
+            starts[i] = max(0, min(onset - self.prefault_cycles, magnitudes.shape[1] - self.window_cycles))
+            onsets[i] = onset - starts[i]
+            detected[i] = True
+        return starts, onsets, detected
+
+    def classify_batch(self, records, sampling_rate):
+        """Aynı örnekleme hızındaki kayıt listesini tek geçişte sınıflandır"""
+        if not records:
+            return pd.DataFrame()
+        samples_per_cycle = int(round(sampling_rate / self.frequency))
+        n_samples = samples_per_cycle * self.window_cycles
+        starts, onsets, detected = self.locate_windows(records, sampling_rate)
+        offsets = starts * samples_per_cycle
+        currents = stack_records(records, n_samples, offsets=offsets)
+
+        voltage_names = [find_voltage_channels(channels) for channels in records]
+        voltages = None
+        if all(voltage_names) and len(set(voltage_names)) == 1:
+            voltages = stack_records(records, n_samples, voltage_names[0], offsets=offsets)
+
+        features = self.extract_features(currents, sampling_rate, voltages, onset=onsets)
+        # Pencere içi periyot numaralarını kaydın başına göre ifade et
+        features['fault_cycle'] += starts
+        features['onset_time_s'] = np.where(detected, (starts + onsets) * samples_per_cycle / sampling_rate, np.nan)
+        features['fault_type'] = self.predict(features)
+        features['fault_label'] = features['fault_type'].map(FAULT_TYPES)
+        return features
+
+    def classify_archive(self, records, sampling_rates):
+        """Farklı örnekleme hızlarındaki kayıtları hıza göre gruplayıp toplu sınıflandır
+
+        Örnekleme hızı bilinmeyen veya IL1/IL2/IL3 kanalları eksik kayıtlar
+        sınıflandırılmaz; 'Belirsiz' olarak ve nedeni 'note' sütununda işaretlenir.
+        """
+        groups = {}
+        skipped = {}
+        for i, rate in enumerate(sampling_rates):
+            rate = parse_sampling_rate(rate)
+            channels = records[i]
+            if not channels or not all(name in channels for name in CURRENT_CHANNELS):
+                skipped[i] = 'IL1/IL2/IL3 kanalları eksik'
+            elif not rate:
+                skipped[i] = 'Örnekleme hızı bilinmiyor'
+            else:
+                groups.setdefault(rate, []).append(i)
+
+        results = []
+        for rate, indices in groups.items():
+            features = self.classify_batch([records[i] for i in indices], rate)
+            features.index = indices
+            results.append(features)
+        if skipped:
+            results.append(pd.DataFrame({
+                'fault_type': 'UNKNOWN',
+                'fault_label': FAULT_TYPES['UNKNOWN'],
+                'note': list(skipped.values())
+            }, index=list(skipped.keys())))
+        if not results:
+            return pd.DataFrame()
+        return pd.concat(results).sort_index()
+
+    def classify_record(self, channels, sampling_rate):
+        """Tek bir kaydın arıza tipini döndür (IL1/IL2/IL3 yoksa None)"""
+        if not channels or not all(name in channels for name in CURRENT_CHANNELS):
+            return None
+        sampling_rate = parse_sampling_rate(sampling_rate)
+        if not sampling_rate:
+            return None
+        return self.classify_batch([channels], sampling_rate).iloc[0]['fault_label']
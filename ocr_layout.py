@@ -0,0 +1,217 @@
+# OCR Bölge Tespiti - Yalnızca metin bloklarını OCR'a gönder, yerleşimi şablon bazında önbellekle
+import json
+import os
+import threading
+import cv2
+import numpy as np
+
+try:
+    import pytesseract
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+# 300 dpi sayfa için metin satırı sınırları (piksel)
+MIN_LINE_HEIGHT = 8
+MAX_LINE_HEIGHT = 80
+MIN_LINE_ASPECT = 0.5
+REGION_PADDING = 6
+
+# Önbellekteki yerleşimin sayfaya uyması için bölge mürekkep yoğunluklarının izin verilen ortalama farkı
+LAYOUT_DENSITY_TOLERANCE = 0.05
+# Önbellekteki bölgelerin dışında kalan metin satırı alanının, kayıtlı değere göre izin verilen artışı
+# (sayfa alanına oran; 300 dpi'da tek bir olay tablosu satırı ~0.003-0.005)
+LAYOUT_OUTSIDE_TOLERANCE = 0.001
+# Aynı şablon/sayfa/boyut için saklanan en fazla yerleşim sayısı (ör. farklı röle modelleri)
+MAX_LAYOUTS_PER_KEY = 4
+
+
+def preprocess_page(image):
+    """Sayfayı gri tonlamaya çevir ve Otsu ile ikili hale getir (koyu metin -> beyaz)"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return image, binary
+
+
+def text_line_mask(binary):
+    """İkili sayfada metin satırı olabilecek alanların maskesini çıkar (grafikler hariç)"""
+    height, width = binary.shape
+
+    # Grafik eksenleri ve ızgara çizgileri gibi uzun çizgileri çıkar
+    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (width // 8, 1)))
+    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 8)))
+    text_only = cv2.subtract(binary, cv2.bitwise_or(horizontal, vertical))
+
+    # Karakterleri yatayda birleştirerek satırları oluştur
+    lines = cv2.dilate(text_only, cv2.getStructuringElement(cv2.MORPH_RECT, (25, 3)))
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    line_mask = np.zeros_like(binary)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        # Dalga şekilleri yüksek ve düzensiz lekeler oluşturur; metin satırları alçaktır
+        if MIN_LINE_HEIGHT <= h <= MAX_LINE_HEIGHT and w / h >= MIN_LINE_ASPECT:
+            line_mask[y:y + h, x:x + w] = 255
+    return line_mask
+
+
+def detect_text_regions(binary, line_mask=None):
+    """İkili sayfada metin bloklarını bul; dalga şekli grafiklerini dışarıda bırak"""
+    height, width = binary.shape
+    if line_mask is None:
+        line_mask = text_line_mask(binary)
+
+    # Yakın satırları bloklarda topla
+    blocks = cv2.dilate(line_mask, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 20)))
+    contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    regions = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        x0, y0 = max(0, x - REGION_PADDING), max(0, y - REGION_PADDING)
+        x1, y1 = min(width, x + w + REGION_PADDING), min(height, y + h + REGION_PADDING)
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+
+    # Okuma sırası: yukarıdan aşağıya, soldan sağa
+    return sorted(regions, key=lambda box: (box[1], box[0]))
+
+
+def ocr_regions(gray, regions, lang='tur+eng'):
+    """Yalnızca verilen bölgeleri OCR'la
+
+    Bölge başına ayrı tesseract süreci açmak yerine bölgeler dışı beyaza
+    boyanır ve sayfa tek çağrıda okunur; grafik alanları böylece OCR'a girmez.
+    """
+    masked = np.full_like(gray, 255)
+    for x, y, w, h in regions:
+        masked[y:y + h, x:x + w] = gray[y:y + h, x:x + w]
+    return pytesseract.image_to_string(masked, lang=lang)
+
+
+def region_densities(binary, regions):
+    """Her bölgedeki mürekkep (metin pikseli) oranını döndür - yerleşimin sayfaya uyup uymadığını gösterir"""
+    return [float(binary[y:y + h, x:x + w].mean()) / 255.0 if w and h else 0.0 for x, y, w, h in regions]
+
+
+def outside_text_ratio(line_mask, regions):
+    """Bölgelerin dışında kalan metin satırı alanının sayfaya oranı"""
+    outside = line_mask.copy()
+    for x, y, w, h in regions:
+        outside[y:y + h, x:x + w] = 0
+    return float(outside.mean()) / 255.0
+
+
+def layout_matches(binary, line_mask, layout, tolerance=LAYOUT_DENSITY_TOLERANCE):
+    """Önbellekteki yerleşim bu sayfaya uyuyor mu
+
+    Bölgeler aynı yoğunlukta metin içermeli ve bölgeler dışında kayıtlı
+    olandan fazla metin satırı kalmamalı (ör. uzayan olay tablosu satırları).
+    """
+    current = np.array(region_densities(binary, layout['regions']))
+    cached = np.array(layout['densities'])
+    if not len(current) or (current == 0).any():
+        return False
+    if outside_text_ratio(line_mask, layout['regions']) > layout['outside'] + LAYOUT_OUTSIDE_TOLERANCE:
+        return False
+    return float(np.abs(current - cached).mean()) <= tolerance
+
+
+def _merge_layouts(target, source):
+    """source'taki yerleşimleri target'a ekle (aynı bölgeler tekrar eklenmez)"""
+    for key, layouts in source.items():
+        merged = target.setdefault(key, [])
+        for layout in layouts:
+            if all(layout['regions'] != existing['regions'] for existing in merged):
+                merged.append(layout)
+        del merged[:-MAX_LAYOUTS_PER_KEY]
+
+
+class RegionLayoutCache:
+    """Röle şablonu + sayfa sırası + sayfa boyutuna göre metin bölgesi yerleşimlerini sakla
+
+    Şablon adı tarama PDF'lerinde güvenilir olmadığından anahtar başına birden
+    çok yerleşim tutulur; her biri bölge mürekkep yoğunluklarıyla birlikte
+    saklanır ve yalnızca sayfaya uyan yerleşim yeniden kullanılır.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.layouts = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        if path:
+            _merge_layouts(self.layouts, self._read(path))
+
+    @staticmethod
+    def _read(path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        # Dış alan değeri olmayan eski kayıtlar hiç dış metin yokmuş gibi sıkı doğrulanır
+        return {key: [{'regions': [tuple(box) for box in layout['regions']], 'densities': layout['densities'],
+                       'outside': layout.get('outside', 0.0)}
+                      for layout in layouts]
+                for key, layouts in stored.items()}
+
+    @staticmethod
+    def key(template, page_index, shape):
+        return f"{template}|{page_index}|{shape[1]}x{shape[0]}"
+
+    def find(self, key, binary, line_mask):
+        """Anahtardaki yerleşimlerden bu sayfaya uyan ilkini döndür (yoksa None)"""
+        with self.lock:
+            layouts = list(self.layouts.get(key, []))
+        for layout in reversed(layouts):
+            if layout_matches(binary, line_mask, layout):
+                return layout['regions']
+        return None
+
+    def add(self, key, regions, binary, line_mask):
+        with self.lock:
+            _merge_layouts(self.layouts, {key: [{'regions': list(regions),
+                                                 'densities': region_densities(binary, regions),
+                                                 'outside': outside_text_ratio(line_mask, regions)}]})
+            self.dirty = True
+
+    def save(self):
+        """Yerleşimleri JSON dosyasına atomik olarak yaz (yol verilmişse)
+
+        Aynı dosyayı kullanan diğer süreçlerin yerleşimleri kaybolmasın diye
+        diskteki içerik okunup birleştirilir.
+        """
+        if not self.path or not self.dirty:
+            return
+        with self.lock:
+            _merge_layouts(self.layouts, self._read(self.path))
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.layouts, file, indent=2)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+
+
+def ocr_page(image, page_index, template=None, cache=None, lang='tur+eng'):
+    """Sayfayı bölge bazlı OCR'la; sayfaya uyan yerleşim önbellekte varsa tespiti atla"""
+    gray, binary = preprocess_page(image)
+    line_mask = text_line_mask(binary)
+    key = RegionLayoutCache.key(template, page_index, gray.shape) if template and cache else None
+
+    regions = cache.find(key, binary, line_mask) if key else None
+    if regions is not None:
+        text = ocr_regions(gray, regions, lang)
+        if text.strip():
+            return text
+        # Önbellekteki yerleşim bu sayfaya uymadı, yeniden tespit et
+
+    regions = detect_text_regions(binary, line_mask)
+    if not regions:
+        return pytesseract.image_to_string(gray, lang=lang)
+
+    if key:
+        cache.add(key, regions, binary, line_mask)
+    return ocr_regions(gray, regions, lang)
@@ -0,0 +1,319 @@
+# Röle Kayıt Formatı Ayrıştırıcıları - Üretici bazlı eklenti kaydı ve hızlı format tespiti
+import os
+import re
+
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+SNIFF_BYTES = 4096
+
+PARSER_REGISTRY = {}
+DEFAULT_PARSER = 'sigra_tr'
+
+# Koruma fonksiyonu kodları (ANSI) - üreticiden bağımsız
+ANSI_PROTECTION_CODES = {
+    '46': 'Faz Sırası/Negatif Sıra Koruma',
+    '46D': 'Faz Sırası Koruma - Açma',
+    '47O-': 'Gerilim Düşük Koruma',
+    '47U+': 'Gerilim Yüksek Koruma',
+    '49F': 'Termal Koruma',
+    '50': 'Ani Akım Koruma',
+    '51': 'Zaman Aşırı Akım Koruma',
+    '50N': 'Ani Toprak Koruma',
+    '51N': 'Zaman Aşırı Toprak Koruma',
+    '59': 'Aşırı Gerilim Koruma',
+    '59G': 'Toprak Aşırı Gerilim Koruma',
+    '60': 'Gerilim/Frekans Dengesizlik',
+    '67': 'Yönlü Aşırı Akım Koruma',
+    '67N': 'Yönlü Toprak Koruma',
+    '67NIEF': 'Yönlü Toprak Koruma (İnternal)',
+    '27': 'Az Gerilim Koruma',
+    '79': 'Otomatik Kapama/Açma',
+    '68': 'Blok Koruma'
+}
+
+# İngilizce olay listeleri için koruma durum anahtar kelimeleri (büyük harfle aranır)
+ENGLISH_STATUS_KEYWORDS = {
+    'TRIP': 'Açma',
+    'OPERATE': 'Çalışma',
+    'PICKUP': 'Başlama',
+    'PICK UP': 'Başlama',
+    'START': 'Başlama',
+    'BLOCK': 'Blok',
+    'CLOSED': 'Kapalı',
+    'OPEN': 'Açık'
+}
+
+
+def register_parser(cls):
+    """Ayrıştırıcı sınıfını kayıt defterine ekle (dekoratör)"""
+    PARSER_REGISTRY[cls.name] = cls()
+    return cls
+
+
+def get_parser(name=None):
+    """Adı verilen ayrıştırıcıyı döndür (yoksa varsayılanı)"""
+    return PARSER_REGISTRY.get(name or DEFAULT_PARSER, PARSER_REGISTRY[DEFAULT_PARSER])
+
+
+def empty_fault_info():
+    """Tüm ayrıştırıcıların doldurduğu ortak arıza bilgisi sözlüğü"""
+    return {
+        'device_name': '',
+        'fault_time': '',
+        'sampling_rate': '',
+        'cfg_file': '',
+        'file_path': '',
+        'record_type': '',
+        'cursor_values': {},
+        'active_protections': []
+    }
+
+
+def read_document_head(pdf_path, max_chars=SNIFF_BYTES):
+    """Format tespiti için yalnızca ilk sayfanın metnini ve PDF üst verisini oku"""
+    head = ''
+
+    if FITZ_AVAILABLE:
+        try:
+            doc = fitz.open(pdf_path)
+            if doc.page_count:
+                head = doc.load_page(0).get_text()[:max_chars]
+            metadata = doc.metadata or {}
+            head += '\n' + '\n'.join(metadata.get(field) or '' for field in ('producer', 'creator', 'title'))
+            doc.close()
+        except Exception as e:
+            print(f"PyMuPDF hatası: {e}")
+
+    if not head.strip() and PYPDF2_AVAILABLE:
+        try:
+            with open(pdf_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                if reader.pages:
+                    head = (reader.pages[0].extract_text() or '')[:max_chars]
+        except Exception as e:
+            print(f"PyPDF2 hatası: {e}")
+
+    # Taranmış PDF'lerde metin yoksa üretici bilgisi (Producer/Creator) ham baytlarda kalır.
+    # Info sözlüğü çoğunlukla dosya sonundaki trailer'ın yanındadır; baş ve son KB'lar okunur.
+    try:
+        with open(pdf_path, 'rb') as file:
+            raw = file.read(max_chars)
+            file.seek(0, os.SEEK_END)
+            file.seek(max(file.tell() - max_chars, len(raw)))
+            raw += file.read(max_chars)
+        raw = raw.decode('latin-1', errors='ignore')
+        head += '\n' + '\n'.join(re.findall(r'/(?:Producer|Creator|Title)\s*\(([^)]*)\)', raw))
+    except OSError as e:
+        print(f"Dosya okuma hatası: {e}")
+
+    return head
+
+
+def sniff_parser(head_text):
+    """Belge başlangıcına en çok uyan ayrıştırıcıyı seç"""
+    best_parser, best_score = None, 0
+    for parser in PARSER_REGISTRY.values():
+        score = parser.sniff(head_text)
+        if score > best_score:
+            best_parser, best_score = parser, score
+    return best_parser or get_parser()
+
+
+def detect_parser(pdf_path):
+    """PDF'in tamamını okumadan uygun ayrıştırıcıyı belirle"""
+    return sniff_parser(read_document_head(pdf_path))
+
+
+class RelayFormatParser:
+    """Etiket tabanlı ayrıştırıcı - üretici sınıfları yalnızca işaretleri ve desenleri tanımlar"""
+    name = ''
+    vendor = ''
+    markers = ()
+    patterns = {}
+    protection_codes = ANSI_PROTECTION_CODES
+    status_keywords = ENGLISH_STATUS_KEYWORDS
+
+    def __init__(self):
+        self.compiled_markers = [marker.lower() for marker in self.markers]
+        self.compiled_patterns = {field: re.compile(pattern, re.IGNORECASE)
+                                  for field, pattern in self.patterns.items()}
+
+    def sniff(self, head_text):
+        """Belge başlangıcında bulunan işaret sayısını döndür"""
+        head = head_text.lower()
+        return sum(1 for marker in self.compiled_markers if marker in head)
+
+    def extract_fault_info(self, text_data):
+        """Arıza bilgilerini metin verisinden çıkar"""
+        fault_info = empty_fault_info()
+
+        for line in text_data.split('\n'):
+            line = line.strip()
+            for field, pattern in self.compiled_patterns.items():
+                if fault_info[field]:
+                    continue
+                match = pattern.search(line)
+                if match:
+                    fault_info[field] = ' '.join(group for group in match.groups() if group).strip()
+
+        if fault_info['sampling_rate']:
+            fault_info['sampling_rate'] += ' Hz'
+        return fault_info
+
+    def identify_protection_functions(self, text_data):
+        """Aktif koruma fonksiyonlarını tespit et"""
+        active_protections = []
+
+        for line in text_data.split('\n'):
+            for code, description in self.protection_codes.items():
+                if code in line:
+                    # Aktif olup olmadığını kontrol et
+                    status = self.check_protection_status(line, code)
+                    active_protections.append({
+                        'code': code,
+                        'description': description,
+                        'status': status,
+                        'line': line.strip()
+                    })
+
+        return active_protections
+
+    def check_protection_status(self, line, code):
+        """Koruma fonksiyonunun durumunu kontrol et"""
+        upper_line = line.upper()
+        for keyword, status in self.status_keywords.items():
+            if keyword in upper_line:
+                return status
+
+        return 'Tespit Edildi'
+
+
+@register_parser
+class SigraTurkishParser(RelayFormatParser):
+    name = 'sigra_tr'
+    vendor = 'Siemens SIGRA (Türkçe)'
+    markers = ('Start zamanı', 'Örnekleme hızı', 'Kürsör', 'Kayıt türü', 'Dosya yolu', 'SIGRA')
+    status_keywords = {
+        'pick up': 'Başlama',
+        'trip': 'Açma',
+        'OPER': 'Çalışma',
+        'ACMA': 'Açma',
+        'KAPALI': 'Kapalı',
+        'ACIK': 'Açık',
+        'AKTIF': 'Aktif',
+        'HAZIR': 'Hazır'
+    }
+
+    def extract_fault_info(self, text_data):
+        """Arıza bilgilerini metin verisinden çıkar"""
+        fault_info = empty_fault_info()
+
+        # Metin verilerini analiz et
+        lines = text_data.split('\n')
+
+        for line in lines:
+            line = line.strip()
+
+            # Cihaz adı
+            if 'H10_FIDER_H' in line and not fault_info['device_name']:
+                fault_info['device_name'] = 'H10_FIDER_H'
+
+            # Arıza zamanı
+            if 'Start zamanı:' in line:
+                time_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4} \d{2}:\d{2}:\d{2})', line)
+                if time_match:
+                    fault_info['fault_time'] = time_match.group(1)
+
+            # Örnekleme hızı
+            if 'Örnekleme hızı:' in line:
+                rate_match = re.search(r'(\d+) Hz', line)
+                if rate_match:
+                    fault_info['sampling_rate'] = rate_match.group(1) + ' Hz'
+
+            # CFG dosyası
+            if '.CFG' in line and 'Dosya yolu' not in line:
+                fault_info['cfg_file'] = line.strip()
+
+            # Dosya yolu
+            if 'Dosya yolu:' in line:
+                fault_info['file_path'] = line.replace('Dosya yolu:', '').strip()
+
+            # Kayıt türü
+            if 'Kayıt türü:' in line:
+                fault_info['record_type'] = line.replace('Kayıt türü:', '').strip()
+
+            # Kürsör değerleri
+            if 'Kürsör' in line and 'IL1' in line:
+                cursor_match = re.search(r'IL1 A (\d+,\d+) A (\d+,\d+) A', line)
+                if cursor_match:
+                    fault_info['cursor_values']['IL1_instant'] = cursor_match.group(1)
+                    fault_info['cursor_values']['IL1_rms'] = cursor_match.group(2)
+
+        return fault_info
+
+
+@register_parser
+class SigraEnglishParser(RelayFormatParser):
+    name = 'sigra_en'
+    vendor = 'Siemens SIGRA (English)'
+    markers = ('Start time:', 'Sampling rate:', 'Record type:', 'File path:', 'SIGRA', 'DIGSI')
+    patterns = {
+        'device_name': r'^(?:Device|Relay)(?: name)?\s*:\s*(.+)',
+        'fault_time': r'Start time:\s*(\d{1,2}[./]\d{1,2}[./]\d{4} \d{2}:\d{2}:\d{2})',
+        'sampling_rate': r'Sampling rate:\s*(\d+)\s*Hz',
+        'cfg_file': r'(\S+\.CFG)\b',
+        'file_path': r'File path:\s*(.+)',
+        'record_type': r'Record type:\s*(.+)'
+    }
+
+
+@register_parser
+class AbbParser(RelayFormatParser):
+    name = 'abb'
+    vendor = 'ABB (PCM600 / Relion)'
+    markers = ('ABB', 'PCM600', 'Relion', 'Trig time', 'IED name')
+    patterns = {
+        'device_name': r'(?:IED name|Station name)\s*[:=]\s*(.+)',
+        'fault_time': r'Trig(?:ger)? time\s*[:=]\s*(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})',
+        'sampling_rate': r'Sampl(?:e|ing) (?:rate|frequency)\s*[:=]\s*(\d+)\s*Hz',
+        'cfg_file': r'(\S+\.cfg)\b',
+        'record_type': r'Recording type\s*[:=]\s*(.+)'
+    }
+
+
+@register_parser
+class SchneiderParser(RelayFormatParser):
+    name = 'schneider'
+    vendor = 'Schneider Electric (MiCOM / Easergy)'
+    markers = ('Schneider', 'MiCOM', 'Easergy', 'Fault Record', 'Sampling Frequency')
+    patterns = {
+        'device_name': r'(?:Model Number|Relay Name|Plant Reference)\s*[:=]\s*(.+)',
+        'fault_time': r'(?:Fault|Start) (?:Date|Time)\s*[:=]\s*(\d{1,2}/\d{1,2}/\d{4} \d{2}:\d{2}:\d{2})',
+        'sampling_rate': r'Sampling Frequency\s*[:=]\s*(\d+)\s*Hz',
+        'cfg_file': r'(\S+\.cfg)\b',
+        'record_type': r'Trigger(?: Source)?\s*[:=]\s*(.+)'
+    }
+
+
+@register_parser
+class SelParser(RelayFormatParser):
+    name = 'sel'
+    vendor = 'Schweitzer Engineering Laboratories (SEL)'
+    markers = ('SEL-', 'FID=', 'AcSELerator', 'Event:')
+    patterns = {
+        'device_name': r'^(SEL-\d+\S*)',
+        'fault_time': r'Date:\s*(\d{1,2}/\d{1,2}/\d{2,4})\s+Time:\s*(\d{2}:\d{2}:\d{2})',
+        'sampling_rate': r'Sampl\w* Rate\s*[:=]\s*(\d+)\s*Hz',
+        'cfg_file': r'(\S+\.cfg)\b',
+        'record_type': r'Event:\s*(.+)'
+    }
@@ -0,0 +1,190 @@
+# Harmonik ve Spektral Analiz - Pencereli FFT (STFT) ile zamana bağlı harmonikler
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scipy import signal
+
+from channels import parse_sampling_rate
+
+# Koruma açısından anlamlı harmonik eşikleri (temel bileşene oranla)
+INRUSH_H2_RATIO = 0.15          # 2. harmonik - transformatör ani mıknatıslanma (inrush)
+OVEREXCITATION_H5_RATIO = 0.30  # 5. harmonik - aşırı uyarma (over-excitation)
+# Arıza anındaki basamak geçişi tek pencerede geniş bantlı görünür; şüphe için süreklilik aranır
+SUSTAINED_WINDOWS = 3
+# DC bileşen temel bileşenin bu oranını aşmıyorsa sönüm sabiti hesaplanmaz (gürültü)
+MIN_DC_RATIO = 0.10
+# Temel bileşeni, aynı türden kanalların (akım/gerilim) en büyüğünün bu oranının altında kalan
+# pencerelerde oranlar anlamsızdır (gürültü kanalı, yüksüz faz); NaN raporlanır
+MIN_FUNDAMENTAL_RATIO = 0.05
+# Temel bileşeni DC bileşenin bu oranına ulaşmayan kanallar AC ölçüm değildir (ör. 0/1 ikili kanal)
+MIN_FUNDAMENTAL_TO_DC = 0.5
+# Tek seferde işlenen pencere sayısı - uzun kayıtlar belleğe tümüyle alınmaz
+WINDOWS_PER_CHUNK = 2048
+
+
+@lru_cache(maxsize=32)
+def _window_plan(sampling_rate, frequency, cycles, window, max_harmonic):
+    """Örnekleme hızına göre pencere ve harmonik çekirdeğini hesapla (önbellekli)
+
+    Harmonik h, pencere uzunluğu 'cycles' periyot olduğundan h*cycles numaralı
+    DFT bindedir. Tam spektrum yerine yalnızca bu binlerin çekirdeği tutulur;
+    ölçek scipy.signal.stft ('spectrum') ile aynıdır.
+    """
+    samples_per_cycle = int(round(sampling_rate / frequency))
+    nperseg = samples_per_cycle * cycles
+    window_values = signal.get_window(window, nperseg)
+    max_harmonic = min(max_harmonic, (nperseg // 2) // cycles)
+    bins = np.arange(max_harmonic + 1) * cycles
+    kernel = np.exp(-2j * np.pi * np.outer(np.arange(nperseg), bins) / nperseg)
+    kernel *= (window_values / window_values.sum())[:, None]
+    kernel.setflags(write=False)
+    return {
+        'nperseg': nperseg,
+        'hop': samples_per_cycle,  # her periyotta bir pencere
+        'kernel': kernel           # (nperseg, harmonik)
+    }
+
+
+def _valid_windows(names, fundamental, dc):
+    """Oranların hesaplanabileceği (kanal, pencere) maskesini döndür
+
+    Eşik, kanal adının ilk harfiyle gruplanan (I: akım, U/V: gerilim) kanalların
+    en büyük temel bileşenine göre belirlenir; birimler karışmaz.
+    """
+    channel_max = fundamental.max(axis=1)
+    groups = np.array([name[:1].upper() for name in names])
+    floor = np.empty(len(names))
+    for group in set(groups):
+        members = groups == group
+        floor[members] = MIN_FUNDAMENTAL_RATIO * channel_max[members].max()
+    ac_channel = channel_max >= MIN_FUNDAMENTAL_TO_DC * dc.max(axis=1)
+    return (fundamental >= floor[:, None]) & (fundamental > 0) & ac_channel[:, None]
+
+
+def _nanmax(values):
+    """Kanal başına NaN olmayan en büyük değer (hiç yoksa NaN)"""
+    peak = np.where(np.isnan(values), -np.inf, values).max(axis=1)
+    return np.where(np.isinf(peak), np.nan, peak)
+
+
+def _sustained(ratios, windows=SUSTAINED_WINDOWS):
+    """En az 'windows' pencere boyunca aşılan oranı kanal başına döndür (geçersiz pencereler sayılmaz)"""
+    ratios = np.where(np.isnan(ratios), -np.inf, ratios)
+    if ratios.shape[1] < windows:
+        return ratios.min(axis=1)
+    return np.sort(ratios, axis=1)[:, -windows]
+
+
+def _dc_time_constant(times, dc, fundamental):
+    """DC bileşenin tepe noktasından sonraki üstel sönüm zaman sabitini (s) kanal başına bul
+
+    fundamental'da geçersiz pencereler NaN'dır; geçerli penceresi olmayan kanalda hesap yapılmaz.
+    """
+    n_channels = dc.shape[0]
+    taus = np.full(n_channels, np.nan)
+    peak = dc.argmax(axis=1)
+    reference = _nanmax(fundamental)
+    for ch in range(n_channels):
+        # Anlamlı bir DC ofset yoksa sayısal gürültüye eğri uydurma
+        if np.isnan(reference[ch]) or dc[ch, peak[ch]] <= MIN_DC_RATIO * reference[ch]:
+            continue
+        decay = dc[ch, peak[ch]:]
+        valid = decay > decay[0] * 0.05
+        if valid.sum() < 3:
+            continue
+        slope = np.polyfit(times[peak[ch]:][valid], np.log(decay[valid]), 1)[0]
+        if slope < 0:
+            taus[ch] = -1.0 / slope
+    return taus
+
+
+class SpectralAnalyzer:
+    def __init__(self, frequency=50, max_harmonic=13, cycles=2, window='hann'):
+        self.frequency = frequency
+        self.max_harmonic = max_harmonic
+        self.cycles = cycles
+        self.window = window
+
+    def harmonics(self, channels, sampling_rate):
+        """Tüm kanalların zamana bağlı harmonik genliklerini parça parça hesapla
+
+        Her parçada tüm kanalların pencereleri tek matris çarpımıyla yalnızca
+        harmonik binlerine dönüştürülür; kayıt belleğe tümüyle kopyalanmaz.
+        """
+        names = list(channels.keys())
+        n_samples = min(len(array) for array in channels.values())
+
+        plan = _window_plan(float(sampling_rate), self.frequency, self.cycles, self.window, self.max_harmonic)
+        nperseg, hop, kernel = plan['nperseg'], plan['hop'], plan['kernel']
+        if n_samples < nperseg:
+            return None
+
+        n_windows = (n_samples - nperseg) // hop + 1
+        amplitudes = np.empty((len(names), kernel.shape[1], n_windows))
+        for first in range(0, n_windows, WINDOWS_PER_CHUNK):
+            last = min(first + WINDOWS_PER_CHUNK, n_windows)
+            start, stop = first * hop, (last - 1) * hop + nperseg
+            data = np.stack([np.asarray(channels[name][start:stop], dtype=float) for name in names])
+            segments = np.lib.stride_tricks.sliding_window_view(data, nperseg, axis=-1)[:, ::hop]
+            amplitudes[:, :, first:last] = np.abs(segments @ kernel).transpose(0, 2, 1)
+        amplitudes[:, 1:, :] *= 2.0  # tek taraflı spektrum -> tepe genliği
+
+        return {
+            'channels': names,
+            'times': (np.arange(n_windows) * hop + nperseg / 2) / sampling_rate,
+            'amplitudes': amplitudes  # (kanal, harmonik, zaman)
+        }
+
+    def analyze(self, channels, sampling_rate):
+        """Kaydın harmonik içeriğini, THD'yi ve DC bileşen sönümünü analiz et"""
+        sampling_rate = parse_sampling_rate(sampling_rate)
+        if not channels or not sampling_rate:
+            return None
+
+        result = self.harmonics(channels, sampling_rate)
+        if result is None:
+            return None
+
+        amplitudes = result['amplitudes']
+        valid = _valid_windows(result['channels'], amplitudes[:, 1, :], amplitudes[:, 0, :])
+        # Temel bileşeni anlamsız pencerelerde oranlar NaN kalır
+        fundamental = np.where(valid, amplitudes[:, 1, :], np.nan)
+        ratios = amplitudes / fundamental[:, None, :]
+        thd = np.sqrt((amplitudes[:, 2:, :] ** 2).sum(axis=1)) / fundamental
+        h2 = ratios[:, 2, :] if ratios.shape[1] > 2 else np.where(valid, 0.0, np.nan)
+        h5 = ratios[:, 5, :] if ratios.shape[1] > 5 else np.where(valid, 0.0, np.nan)
+        dc_tau = _dc_time_constant(result['times'], amplitudes[:, 0, :], fundamental)
+
+        summary = pd.DataFrame({
+            'Kanal': result['channels'],
+            'Temel Bileşen Maks (tepe)': amplitudes[:, 1, :].max(axis=1),
+            '2. Harmonik Maks (%)': 100 * _nanmax(h2),
+            '5. Harmonik Maks (%)': 100 * _nanmax(h5),
+            'THD Maks (%)': 100 * _nanmax(thd),
+            'DC Sönüm Sabiti (ms)': 1000 * dc_tau,
+            'Inrush Şüphesi': _sustained(h2) > INRUSH_H2_RATIO,
+            'Aşırı Uyarma Şüphesi': _sustained(h5) > OVEREXCITATION_H5_RATIO
+        })
+
+        result.update({
+            'thd': thd,
+            'h2_ratio': h2,
+            'h5_ratio': h5,
+            'dc_time_constant': dc_tau,
+            'summary': summary
+        })
+        return result
+
+    def to_dataframe(self, result):
+        """Zamana bağlı harmonik sonuçlarını uzun formatta DataFrame'e çevir"""
+        amplitudes = result['amplitudes']
+        n_channels, n_harmonics, n_times = amplitudes.shape
+        frame = pd.DataFrame({
+            'Zaman (s)': np.tile(result['times'], n_channels),
+            'Kanal': np.repeat(result['channels'], n_times),
+            'DC': amplitudes[:, 0, :].ravel()
+        })
+        for h in range(1, n_harmonics):
+            frame[f'H{h}'] = amplitudes[:, h, :].ravel()
+        frame['THD (%)'] = 100 * result['thd'].ravel()
+        return frame
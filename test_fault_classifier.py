@@ -0,0 +1,97 @@
+# Arıza tipi sınıflandırıcısı için davranış testleri (sentetik üç faz kayıtlar)
+import numpy as np
+
+from fault_classifier import FaultClassifier
+
+FS = 1000
+FREQUENCY = 50
+LOAD = 100.0
+FAULT = 1500.0
+
+
+def _record(faulted_phases, onset=0.2, duration=2.0, second=None):
+    """Verilen fazlarında 'onset' anında arıza akımı başlayan kayıt üret"""
+    t = np.arange(int(duration * FS)) / FS
+    channels = {}
+    for k, name in enumerate(('IL1', 'IL2', 'IL3')):
+        angle = 2 * np.pi * FREQUENCY * t - 2 * np.pi * k / 3
+        current = LOAD * np.sin(angle)
+        if name in faulted_phases:
+            current = np.where(t >= onset, FAULT * np.sin(angle - 1.2), current)
+        if second and name in second[0]:
+            current = np.where(t >= second[1], FAULT * np.sin(angle - 1.2), current)
+        channels[name] = current
+    if len(faulted_phases) == 2:
+        # Faz-faz arızasında iki fazın arıza akımları eşit ve zıt yönlüdür
+        first, other = faulted_phases
+        loop = FAULT * np.sin(2 * np.pi * FREQUENCY * t - 1.2)
+        channels[first] = np.where(t >= onset, loop, channels[first])
+        channels[other] = np.where(t >= onset, -loop, channels[other])
+    return channels
+
+
+def _classify(channels, fs=FS):
+    return FaultClassifier().classify_batch([channels], fs).iloc[0]['fault_type']
+
+
+def test_single_line_to_ground():
+    assert _classify(_record(['IL1'])) == 'SLG'
+
+
+def test_line_to_line():
+    assert _classify(_record(['IL2', 'IL3'])) == 'LL'
+
+
+def test_three_phase():
+    assert _classify(_record(['IL1', 'IL2', 'IL3'])) == 'LLL'
+
+
+def test_evolving():
+    assert _classify(_record(['IL1'], onset=0.2, second=(['IL2'], 0.3))) == 'EVOLVING'
+
+
+def test_late_onset_outside_first_window():
+    # 2 s kaydın 1.0 s'sinde başlayan arıza ilk 25 periyodun çok dışında kalır
+    features = FaultClassifier().classify_batch([_record(['IL1'], onset=1.0)], FS)
+    assert features.iloc[0]['fault_type'] == 'SLG'
+    assert abs(features.iloc[0]['onset_time_s'] - 1.0) <= 2 / FREQUENCY
+
+
+def test_healthy_record_is_unknown():
+    assert _classify(_record([])) == 'UNKNOWN'
+
+
+def _healthy(amplitudes=(LOAD, LOAD, LOAD), h3_ratio=0.0, duration=2.0):
+    """Arızasız, isteğe bağlı dengesiz ve 3. harmonikli üç faz yük akımı"""
+    t = np.arange(int(duration * FS)) / FS
+    channels = {}
+    for k, (name, amplitude) in enumerate(zip(('IL1', 'IL2', 'IL3'), amplitudes)):
+        angle = 2 * np.pi * FREQUENCY * t - 2 * np.pi * k / 3
+        channels[name] = amplitude * (np.sin(angle) + h3_ratio * np.sin(3 * angle))
+    return channels
+
+
+def test_unbalanced_healthy_record_is_not_hiz():
+    assert _classify(_healthy((LOAD, LOAD, 0.7 * LOAD))) == 'UNKNOWN'
+
+
+def test_triplen_harmonics_healthy_record_is_not_hiz():
+    assert _classify(_healthy(h3_ratio=0.05)) == 'UNKNOWN'
+
+
+def test_high_impedance_fault_after_onset():
+    # Aşırı akım oluşturmayan, 3. harmonikli toprak kaçağı 1.0 s'de başlar
+    channels = _healthy((LOAD, LOAD, 0.7 * LOAD))
+    t = np.arange(len(channels['IL1'])) / FS
+    leak = 0.45 * LOAD * np.sin(2 * np.pi * FREQUENCY * t) + 0.08 * LOAD * np.sin(6 * np.pi * FREQUENCY * t)
+    channels['IL1'] = channels['IL1'] + np.where(t >= 1.0, leak, 0.0)
+    features = FaultClassifier().classify_batch([channels], FS)
+    assert features.iloc[0]['fault_type'] == 'HIZ'
+    assert abs(features.iloc[0]['onset_time_s'] - 1.0) <= 2 / FREQUENCY
+
+
+def test_archive_marks_unknown_sampling_rate():
+    records = [_record(['IL1']), _record(['IL1', 'IL2', 'IL3']), {'IL1': np.zeros(10)}]
+    features = FaultClassifier().classify_archive(records, ['1000 Hz', None, '1000 Hz'])
+    assert list(features['fault_type']) == ['SLG', 'UNKNOWN', 'UNKNOWN']
+    assert features['note'].notna().tolist() == [False, True, True]